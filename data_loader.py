@@ -0,0 +1,78 @@
+import pandas as pd
+
+SAMPLE_ROWS = 1000
+# text columns with fewer distinct values than this share of rows become categoricals
+CATEGORY_RATIO = 0.5
+# dtype names pandas reports for text columns (object before pandas 3, str after)
+STRING_DTYPES = ("object", "str", "string")
+
+
+def read_sample(file, nrows: int = SAMPLE_ROWS) -> pd.DataFrame:
+    """Phase one: read the header plus a small sample of rows."""
+    return pd.read_csv(file, nrows=nrows)
+
+
+def describe(sample: pd.DataFrame) -> dict:
+    """
+    Returns the {column: dtype_name} schema sent with the prompt. Dtypes are
+    inferred from the sample only, which is enough for the model to pick columns.
+    """
+    return sample.dtypes.apply(lambda x: x.name).to_dict()
+
+
+def _is_low_cardinality(series: pd.Series) -> bool:
+    return len(series) > 0 and series.nunique() < len(series) * CATEGORY_RATIO
+
+
+def load_dtypes(sample: pd.DataFrame, columns: list) -> dict:
+    """
+    Build the read_csv dtype map for `columns` from the sample: float32 for
+    float columns and category for low-cardinality text. Integer columns are
+    left to pandas and shrunk afterwards, since the sample cannot prove they
+    have no gaps or larger values further down.
+    """
+    dtype = {}
+    for col in columns:
+        series = sample[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_float_dtype(series):
+            dtype[col] = "float32"
+        elif series.dtype.name in STRING_DTYPES and _is_low_cardinality(series):
+            dtype[col] = "category"
+    return dtype
+
+
+def downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """Shrink floats to float32, ints to the smallest int type and low-cardinality strings to categoricals."""
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            df[col] = series.astype("float32")
+        elif series.dtype.name in STRING_DTYPES and _is_low_cardinality(series):
+            df[col] = series.astype("category")
+    return df
+
+
+def read_columns(file, columns: list, sample: pd.DataFrame) -> pd.DataFrame:
+    """
+    Phase two: read only `columns` from the file, parsing them straight into
+    the dtypes chosen from the sample, then downcast whatever is left.
+    An empty `columns` list reads everything; unknown columns raise ValueError.
+    """
+    missing = [c for c in columns if c not in sample.columns]
+    if missing:
+        raise ValueError(f"Columns not found in the uploaded file: {', '.join(missing)}")
+    usecols = list(columns) or None
+    dtype = load_dtypes(sample, usecols if usecols is not None else list(sample.columns))
+    try:
+        df = pd.read_csv(file, usecols=usecols, dtype=dtype or None)
+    except (ValueError, TypeError):
+        # a value past the sample did not fit its guessed dtype; parse without hints
+        file.seek(0)
+        df = pd.read_csv(file, usecols=usecols)
+    return downcast(df)
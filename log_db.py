@@ -1,6 +1,6 @@
 import sqlite3
 import json
-from typing import List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 DB_SCHEMA = '''
@@ -11,6 +11,14 @@ CREATE TABLE IF NOT EXISTS logs (
 );
 '''
 
+THUMBNAIL_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS thumbnails (
+    timestamp INTEGER PRIMARY KEY,
+    thumbnail TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT ''
+);
+'''
+
 
 def _get_conn(db_path: str = 'logs.sqlite3') -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
@@ -24,7 +32,9 @@ def _ensure_schema(db_path: str = 'logs.sqlite3') -> None:
         # If table does not exist, create with new schema
         cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='logs'")
         if not cur.fetchone():
-            conn.executescript(DB_SCHEMA)
+            # must be set before the first table exists; lets retention reclaim space incrementally
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.executescript(DB_SCHEMA + THUMBNAIL_SCHEMA)
             conn.commit()
             return
 
@@ -77,6 +87,17 @@ def _ensure_schema(db_path: str = 'logs.sqlite3') -> None:
         conn.close()
 
 
+def _ensure_thumbnail_schema(db_path: str = 'logs.sqlite3') -> None:
+    # a fresh database is always initialised through _ensure_schema, so auto_vacuum is set first
+    _ensure_schema(db_path)
+    conn = _get_conn(db_path)
+    try:
+        conn.executescript(THUMBNAIL_SCHEMA)
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def _migrate_timestamps(db_path: str = 'logs.sqlite3') -> None:
     """Migrate any non-integer timestamp values (e.g., ISO strings) to epoch integers.
 
@@ -148,6 +169,11 @@ def _to_epoch(ts) -> int:
     raise ValueError(f"Unsupported timestamp type: {type(ts)}")
 
 
+def parse_timestamp(ts) -> int:
+    """Parse an epoch number, numeric string, ISO string or datetime into epoch seconds."""
+    return _to_epoch(ts)
+
+
 def insert(timestamp, jsonschema: dict, dbfilename: str, db_path: str = 'logs.sqlite3') -> bool:
     """Insert a new log row into the database.
 
@@ -216,6 +242,206 @@ def getdata(timestamp, db_path: str = 'logs.sqlite3') -> Optional[Tuple[dict, st
         conn.close()
 
 
+def insert_thumbnails(rows: List[Tuple[int, str, str]], db_path: str = 'logs.sqlite3') -> int:
+    """Store (timestamp, thumbnail, title) rows, replacing any existing thumbnail.
+
+    The title is kept next to the thumbnail so history views never have to
+    read the full log payload.
+
+    Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    _ensure_thumbnail_schema(db_path)
+    conn = _get_conn(db_path)
+    try:
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO thumbnails (timestamp, thumbnail, title) VALUES (?, ?, ?)',
+                [(_to_epoch(ts), thumb, title or '') for ts, thumb, title in rows]
+            )
+        return len(rows)
+    finally:
+        conn.close()
+
+
+def gettitles(db_path: str = 'logs.sqlite3') -> Dict[int, str]:
+    """Return a {timestamp: title} mapping for every log that has a thumbnail.
+
+    Thumbnail payloads are left out; they are served one at a time by timestamp.
+    """
+    _ensure_thumbnail_schema(db_path)
+    conn = _get_conn(db_path)
+    try:
+        cur = conn.execute(
+            'SELECT t.timestamp, t.title FROM thumbnails t '
+            'JOIN logs l ON l.timestamp = t.timestamp ORDER BY t.timestamp ASC'
+        )
+        return {int(row['timestamp']): row['title'] for row in cur.fetchall()}
+    finally:
+        conn.close()
+
+
+def getthumbnail(timestamp, db_path: str = 'logs.sqlite3') -> Optional[Tuple[str, str]]:
+    """Return (thumbnail, title) for a timestamp, or None if the thumbnail has not been generated yet."""
+    _ensure_thumbnail_schema(db_path)
+    ts_epoch = _to_epoch(timestamp)
+    conn = _get_conn(db_path)
+    try:
+        row = conn.execute('SELECT thumbnail, title FROM thumbnails WHERE timestamp = ?', (ts_epoch,)).fetchone()
+        return (row['thumbnail'], row['title']) if row else None
+    finally:
+        conn.close()
+
+
+def iter_missing_thumbnails(batch_size: int = 50, db_path: str = 'logs.sqlite3') -> Iterator[List[Tuple[int, dict]]]:
+    """Yield batches of (timestamp, jsonschema_dict) for logs without a thumbnail.
+
+    Batches are keyed on timestamp so the caller can write thumbnails between
+    batches without the cursor skipping or repeating rows.
+    """
+    _ensure_thumbnail_schema(db_path)
+    last = None
+    while True:
+        conn = _get_conn(db_path)
+        try:
+            cur = conn.execute(
+                'SELECT l.timestamp, l.jsonschema FROM logs l '
+                'LEFT JOIN thumbnails t ON t.timestamp = l.timestamp '
+                'WHERE t.timestamp IS NULL AND (? IS NULL OR l.timestamp > ?) '
+                'ORDER BY l.timestamp ASC LIMIT ?',
+                (last, last, batch_size)
+            )
+            rows = cur.fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        batch = []
+        for row in rows:
+            try:
+                batch.append((int(row['timestamp']), json.loads(row['jsonschema'])))
+            except Exception:
+                # skip rows with unparsable payloads
+                continue
+        last = int(rows[-1]['timestamp'])
+        yield batch
+
+
+def getsizes(db_path: str = 'logs.sqlite3') -> List[Tuple[int, int]]:
+    """Return (timestamp, stored_bytes) for every log, newest first.
+
+    stored_bytes covers the log payload plus its thumbnail, if any.
+    """
+    _ensure_thumbnail_schema(db_path)
+    conn = _get_conn(db_path)
+    try:
+        cur = conn.execute(
+            'SELECT l.timestamp, length(l.jsonschema) + length(l.dbfilename) + coalesce(length(t.thumbnail), 0) AS size '
+            'FROM logs l LEFT JOIN thumbnails t ON t.timestamp = l.timestamp ORDER BY l.timestamp DESC'
+        )
+        return [(int(row['timestamp']), int(row['size'])) for row in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def getrows(timestamps: List[int], db_path: str = 'logs.sqlite3') -> List[dict]:
+    """Return full rows (timestamp, jsonschema, dbfilename, thumbnail) for the given timestamps."""
+    if not timestamps:
+        return []
+    _ensure_thumbnail_schema(db_path)
+    conn = _get_conn(db_path)
+    try:
+        placeholders = ','.join('?' * len(timestamps))
+        cur = conn.execute(
+            'SELECT l.timestamp, l.jsonschema, l.dbfilename, t.thumbnail FROM logs l '
+            'LEFT JOIN thumbnails t ON t.timestamp = l.timestamp '
+            f'WHERE l.timestamp IN ({placeholders}) ORDER BY l.timestamp ASC',
+            list(timestamps)
+        )
+        out = []
+        for row in cur.fetchall():
+            try:
+                js = json.loads(row['jsonschema'])
+            except Exception:
+                # keep the raw text so nothing is lost on archive
+                js = row['jsonschema']
+            out.append({
+                'timestamp': int(row['timestamp']),
+                'jsonschema': js,
+                'dbfilename': row['dbfilename'],
+                'thumbnail': row['thumbnail'],
+            })
+        return out
+    finally:
+        conn.close()
+
+
+def delete(timestamps: List[int], db_path: str = 'logs.sqlite3') -> int:
+    """Delete the given logs and their thumbnails in one short transaction. Returns rows deleted."""
+    if not timestamps:
+        return 0
+    _ensure_thumbnail_schema(db_path)
+    conn = _get_conn(db_path)
+    try:
+        placeholders = ','.join('?' * len(timestamps))
+        with conn:
+            conn.execute(f'DELETE FROM thumbnails WHERE timestamp IN ({placeholders})', list(timestamps))
+            cur = conn.execute(f'DELETE FROM logs WHERE timestamp IN ({placeholders})', list(timestamps))
+        return cur.rowcount
+    finally:
+        conn.close()
+
+
+def is_incremental(db_path: str = 'logs.sqlite3') -> bool:
+    """True if the database has auto_vacuum = INCREMENTAL, so free pages can be released piecemeal."""
+    conn = _get_conn(db_path)
+    try:
+        return int(conn.execute('PRAGMA auto_vacuum').fetchone()[0]) == 2
+    finally:
+        conn.close()
+
+
+def convert_to_incremental(db_path: str = 'logs.sqlite3') -> bool:
+    """Switch a database created before auto_vacuum was enabled to INCREMENTAL mode.
+
+    This needs a full VACUUM, which holds an exclusive lock for its whole
+    duration, so only run it while the server is stopped. Returns True if
+    the database was converted, False if it already was incremental.
+    """
+    if is_incremental(db_path):
+        return False
+    conn = _get_conn(db_path)
+    try:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+        return True
+    finally:
+        conn.close()
+
+
+def incremental_vacuum(max_pages: Optional[int] = None, db_path: str = 'logs.sqlite3') -> int:
+    """Return free pages to the filesystem. Returns the number of pages released.
+
+    Does nothing (and returns 0) unless the database is in INCREMENTAL
+    mode; see convert_to_incremental().
+    """
+    conn = _get_conn(db_path)
+    try:
+        if int(conn.execute('PRAGMA auto_vacuum').fetchone()[0]) != 2:
+            return 0
+        before = int(conn.execute('PRAGMA freelist_count').fetchone()[0])
+        # executescript steps the pragma to completion; execute() would free a single page
+        if max_pages is None:
+            conn.executescript('PRAGMA incremental_vacuum;')
+        else:
+            conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)});')
+        after = int(conn.execute('PRAGMA freelist_count').fetchone()[0])
+        return before - after
+    finally:
+        conn.close()
+
+
 def getdata_interactive(db_path: str = 'logs.sqlite3') -> None:
     """Prompt the user for a timestamp (epoch or ISO) and print the stored jsonschema and dbfilename."""
     inp = input('Enter timestamp (epoch seconds or ISO string): ').strip()
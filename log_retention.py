@@ -0,0 +1,264 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import time
+from datetime import datetime
+from typing import Iterator, List, Optional
+from dotenv import load_dotenv
+from log_db import (
+    convert_to_incremental,
+    delete,
+    getrows,
+    getsizes,
+    incremental_vacuum,
+    is_incremental,
+    parse_timestamp
+)
+load_dotenv()
+
+DEFAULT_ARCHIVE_DIR = 'log_archive'
+DEFAULT_BATCH_SIZE = 200
+
+
+def _env_number(name: str, cast=int):
+    value = os.getenv(name)
+    if value in (None, ''):
+        return None
+    return cast(value)
+
+
+def expired_timestamps(sizes: List[tuple], now: int, max_age_days: Optional[float] = None,
+                       max_rows: Optional[int] = None, max_bytes: Optional[int] = None) -> List[int]:
+    """
+    Given (timestamp, bytes) pairs ordered newest first, return the timestamps
+    that fall outside any of the limits, oldest first. Unset limits are ignored.
+    """
+    cutoff = now - int(max_age_days * 86400) if max_age_days is not None else None
+    expired = []
+    kept_rows = 0
+    kept_bytes = 0
+    for ts, size in sizes:
+        too_old = cutoff is not None and ts < cutoff
+        too_many = max_rows is not None and kept_rows >= max_rows
+        too_big = max_bytes is not None and kept_bytes + size > max_bytes
+        if too_old or too_many or too_big:
+            expired.append(ts)
+            # once one row is dropped everything older goes too, so the kept set stays contiguous
+            cutoff = ts + 1 if cutoff is None else max(cutoff, ts + 1)
+            continue
+        kept_rows += 1
+        kept_bytes += size
+    expired.reverse()
+    return expired
+
+
+PARTIAL_SUFFIX = '.partial'
+
+
+def _archive_batch(rows: List[dict], partial_path: str) -> None:
+    with gzip.open(partial_path, 'wt', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def _recover_partials(archive_dir: str, live: set) -> None:
+    """
+    Settle archives left behind by an interrupted run. A partial file whose
+    rows are all gone from the database was deleted but never renamed, so it
+    is kept; otherwise the delete never committed and the rows will be
+    archived again, so it is dropped.
+    """
+    for partial in glob.glob(os.path.join(archive_dir, 'logs-*.jsonl.gz' + PARTIAL_SUFFIX)):
+        try:
+            with gzip.open(partial, 'rt', encoding='utf-8') as f:
+                stamps = [json.loads(line)['timestamp'] for line in f]
+        except (OSError, EOFError, ValueError, KeyError):
+            stamps = None
+        if stamps is not None and not live.intersection(stamps):
+            os.replace(partial, partial[:-len(PARTIAL_SUFFIX)])
+        else:
+            os.remove(partial)
+
+
+def apply_retention(db_path: str = 'logs.sqlite3', max_age_days: Optional[float] = None,
+                    max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                    archive_dir: Optional[str] = DEFAULT_ARCHIVE_DIR, batch_size: int = DEFAULT_BATCH_SIZE,
+                    pause: float = 0.05, vacuum_pages: Optional[int] = None, dry_run: bool = False) -> dict:
+    """
+    Archive and delete logs that exceed the retention limits, then reclaim space.
+
+    Expired rows are deleted `batch_size` rows per transaction, sleeping
+    `pause` seconds between batches so the server is never locked out for
+    long. Unless `archive_dir` is None, each batch is first written to its
+    own gzipped JSON-lines file, which only gets its final name once the
+    delete has committed, so a failed or interrupted run never leaves rows
+    both archived and in the database. Space is only reclaimed when
+    something was deleted and the database is in incremental auto_vacuum
+    mode; older databases need a one-off convert_to_incremental() first.
+
+    Returns a report dict with the rows expired and the bytes reclaimed.
+    """
+    now = int(time.time())
+    sizes = getsizes(db_path)
+    expired = expired_timestamps(sizes, now, max_age_days, max_rows, max_bytes)
+    report = {
+        'expired': len(expired),
+        'deleted': 0,
+        'archives': [],
+        'pages_released': 0,
+        'bytes_before': os.path.getsize(db_path),
+        'bytes_after': None,
+        'bytes_reclaimed': 0,
+        'incremental': is_incremental(db_path),
+    }
+    if archive_dir and os.path.isdir(archive_dir) and not dry_run:
+        _recover_partials(archive_dir, {ts for ts, _ in sizes})
+    if dry_run or not expired:
+        report['bytes_after'] = report['bytes_before']
+        return report
+
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+
+    for i in range(0, len(expired), batch_size):
+        batch = expired[i:i + batch_size]
+        if archive_dir:
+            archive_path = os.path.join(archive_dir, f'logs-{batch[0]}-{batch[-1]}.jsonl.gz')
+            partial_path = archive_path + PARTIAL_SUFFIX
+            _archive_batch(getrows(batch, db_path=db_path), partial_path)
+            try:
+                report['deleted'] += delete(batch, db_path=db_path)
+            except Exception:
+                os.remove(partial_path)
+                raise
+            os.replace(partial_path, archive_path)
+            report['archives'].append(archive_path)
+        else:
+            report['deleted'] += delete(batch, db_path=db_path)
+        if pause and i + batch_size < len(expired):
+            time.sleep(pause)
+
+    report['pages_released'] = incremental_vacuum(vacuum_pages, db_path=db_path)
+    report['bytes_after'] = os.path.getsize(db_path)
+    report['bytes_reclaimed'] = report['bytes_before'] - report['bytes_after']
+    return report
+
+
+def query_archive(archive_dir: str = DEFAULT_ARCHIVE_DIR, since=None, until=None,
+                  contains: Optional[str] = None) -> Iterator[dict]:
+    """
+    Read archived logs back without touching the database. `since`/`until`
+    accept anything log_db understands as a timestamp; `contains` matches
+    case-insensitively against the stored query text.
+    """
+    since = parse_timestamp(since) if since is not None else None
+    until = parse_timestamp(until) if until is not None else None
+    needle = contains.lower() if contains else None
+    for path in sorted(glob.glob(os.path.join(archive_dir, 'logs-*.jsonl.gz'))):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # tolerate a truncated tail from an interrupted run
+                    continue
+                ts = row.get('timestamp')
+                if since is not None and ts < since:
+                    continue
+                if until is not None and ts > until:
+                    continue
+                if needle:
+                    js = row.get('jsonschema')
+                    text = js.get('query', '') if isinstance(js, dict) else str(js)
+                    if needle not in (text or '').lower():
+                        continue
+                yield row
+
+
+def _print_report(report: dict) -> None:
+    print(f"[{datetime.now().isoformat(timespec='seconds')}] "
+          f"expired={report['expired']} deleted={report['deleted']} "
+          f"pages_released={report['pages_released']} "
+          f"bytes_reclaimed={report['bytes_reclaimed']} "
+          f"({report['bytes_before']} -> {report['bytes_after']})"
+          + (f" archives={len(report['archives'])}" if report['archives'] else ''))
+    if report['deleted'] and not report['incremental']:
+        print('  database is not in incremental auto_vacuum mode, so no space was returned; '
+              'stop the server and run once with --convert')
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Retention, archival and compaction for the logs database.')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Archive and delete expired logs, then vacuum')
+    run.add_argument('--db', default=os.getenv('LOG_DB_PATH', 'logs.sqlite3'))
+    run.add_argument('--max-age-days', type=float, default=_env_number('LOG_RETENTION_MAX_AGE_DAYS', float))
+    run.add_argument('--max-rows', type=int, default=_env_number('LOG_RETENTION_MAX_ROWS'))
+    run.add_argument('--max-bytes', type=int, default=_env_number('LOG_RETENTION_MAX_BYTES'))
+    run.add_argument('--archive-dir', default=os.getenv('LOG_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    run.add_argument('--no-archive', action='store_true', help='Delete expired logs without archiving them')
+    run.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    run.add_argument('--vacuum-pages', type=int, default=None, help='Cap pages released per run (default: all free pages)')
+    run.add_argument('--dry-run', action='store_true', help='Only report what would expire')
+    run.add_argument('--interval', type=float, default=None, help='Repeat every N seconds instead of running once')
+    run.add_argument('--convert', action='store_true',
+                     help='One-off: switch an older database to incremental auto_vacuum (full VACUUM, stop the server first)')
+
+    query = sub.add_parser('query', help='Search archived logs offline')
+    query.add_argument('--archive-dir', default=os.getenv('LOG_ARCHIVE_DIR', DEFAULT_ARCHIVE_DIR))
+    query.add_argument('--since', default=None, help='Epoch seconds or ISO timestamp')
+    query.add_argument('--until', default=None, help='Epoch seconds or ISO timestamp')
+    query.add_argument('--contains', default=None, help='Substring of the stored query')
+    query.add_argument('--with-images', action='store_true', help='Include image and thumbnail payloads')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'query':
+        for row in query_archive(args.archive_dir, args.since, args.until, args.contains):
+            if not args.with_images:
+                row.pop('thumbnail', None)
+                if isinstance(row.get('jsonschema'), dict):
+                    row['jsonschema'] = {k: v for k, v in row['jsonschema'].items() if k != 'image'}
+            print(json.dumps(row))
+        return
+
+    if args.convert:
+        if not os.path.exists(args.db):
+            parser.error(f'--convert: database {args.db} does not exist')
+        before = os.path.getsize(args.db)
+        converted = convert_to_incremental(args.db)
+        print(f"converted={converted} bytes_reclaimed={before - os.path.getsize(args.db)}")
+
+    if args.max_age_days is None and args.max_rows is None and args.max_bytes is None:
+        if args.convert:
+            return
+        parser.error('set at least one of --max-age-days, --max-rows, --max-bytes (or the LOG_RETENTION_* env vars)')
+
+    while True:
+        try:
+            report = apply_retention(
+                db_path=args.db,
+                max_age_days=args.max_age_days,
+                max_rows=args.max_rows,
+                max_bytes=args.max_bytes,
+                archive_dir=None if args.no_archive else args.archive_dir,
+                batch_size=args.batch_size,
+                vacuum_pages=args.vacuum_pages,
+                dry_run=args.dry_run,
+            )
+            _print_report(report)
+        except Exception as e:
+            if not args.interval:
+                raise
+            # e.g. "database is locked" while the server writes; try again next interval
+            print(f"[{datetime.now().isoformat(timespec='seconds')}] ⚠️ Retention run failed:", e)
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
@@ -147,15 +147,50 @@ def generate_visualization_from_schema(df: pd.DataFrame, viz_schema: dict) -> Im
 
 
 
-def generate_visualization(df: pd.DataFrame, schema: dict, user_query: str) -> str:
+# columns each chart type reads from the dataframe
+PLAN_FIELDS = {
+    "bar": ("x", "y"),
+    "line": ("x", "y"),
+    "scatter": ("x", "y"),
+    "pie": ("labels", "values"),
+    "histogram": ("x",),
+}
+
+
+def check_plan(viz_schema: dict, columns: list) -> None:
     """
-    End-to-end pipeline:
-    1. Send schema + query to GPT (via Lambda)
-    2. Get visualization JSON schema
-    3. Generate and return base64-encoded chart image
+    Raises ValueError if the visualization schema is empty, names an
+    unsupported chart type, or references columns the data does not have.
+    """
+    chart_type = viz_schema.get("chart_type")
+    if chart_type not in PLAN_FIELDS:
+        raise ValueError(f"Unsupported chart type: {chart_type}")
+    missing_fields = [f for f in PLAN_FIELDS[chart_type] if not viz_schema.get(f)]
+    if missing_fields:
+        raise ValueError(f"{chart_type} chart is missing: {', '.join(missing_fields)}")
+    missing = [c for c in plan_columns(viz_schema) if c not in columns]
+    if missing:
+        raise ValueError(f"Columns not found in the uploaded file: {', '.join(missing)}")
+
+
+def plan_columns(viz_schema: dict) -> list:
+    """
+    Returns the dataframe columns a visualization schema references,
+    in order and without duplicates.
+    """
+    columns = []
+    for key in ("x", "y", "labels", "values"):
+        col = viz_schema.get(key)
+        if isinstance(col, str) and col not in columns:
+            columns.append(col)
+    return columns
+
+
+def render_visualization(df: pd.DataFrame, viz_schema: dict) -> str:
+    """
+    Creates the chart described by the visualization schema
+    and returns it as a base64-encoded PNG.
     """
-    viz_schema = generate_visualization_schema(schema, user_query)
-    print("Visualization Schema:\n", viz_schema)
     img = generate_visualization_from_schema(df, viz_schema)
      
     buffered = io.BytesIO()
@@ -163,3 +198,15 @@ def generate_visualization(df: pd.DataFrame, schema: dict, user_query: str) -> s
     img_base64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
     
     return img_base64
+
+
+def generate_visualization(df: pd.DataFrame, schema: dict, user_query: str) -> str:
+    """
+    End-to-end pipeline:
+    1. Send schema + query to GPT (via Lambda)
+    2. Get visualization JSON schema
+    3. Generate and return base64-encoded chart image
+    """
+    viz_schema = generate_visualization_schema(schema, user_query)
+    print("Visualization Schema:\n", viz_schema)
+    return render_visualization(df, viz_schema)
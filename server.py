@@ -1,15 +1,24 @@
 
+from base64 import b64decode
 from time import time 
 from dotenv import load_dotenv
 from log_db import (
     insert,
     getlogs,
-    getdata
+    getdata,
+    getthumbnail,
+    gettitles
 )
+from thumbnails import schedule_thumbnail
 load_dotenv()
-import pandas as pd
-from promptframework import generate_visualization
-from flask import Flask, request, jsonify
+from data_loader import read_sample, describe, read_columns
+from promptframework import (
+    check_plan,
+    generate_visualization_schema,
+    plan_columns,
+    render_visualization
+)
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS   
 app = Flask(__name__)
 CORS(app)   
@@ -21,10 +30,27 @@ def receive_data():
     print("Received query:", query) 
     uploaded_file = request.files.get("file")
     print(uploaded_file)   
-    df=pd.read_csv(uploaded_file)
-    col_dtype_dict = df.dtypes.apply(lambda x: x.name).to_dict()
-    img="data:image/png;base64,"+ generate_visualization(df, col_dtype_dict, query)
-    insert(time(), {"query":query,"image":img},"test")
+    # phase one: header + sample is enough to plan the chart
+    sample = read_sample(uploaded_file.stream)
+    col_dtype_dict = describe(sample)
+    viz_schema = generate_visualization_schema(col_dtype_dict, query)
+    print("Visualization Schema:\n", viz_schema)
+    try:
+        check_plan(viz_schema, list(sample.columns))
+    except ValueError as e:
+        # don't parse the whole file for a plan that can't be drawn
+        return jsonify({
+            "status": "error",
+            "query": query,
+            "message": str(e)
+        }), 400
+    # phase two: load only the columns the plan uses
+    uploaded_file.stream.seek(0)
+    df=read_columns(uploaded_file.stream, plan_columns(viz_schema), sample)
+    img="data:image/png;base64,"+ render_visualization(df, viz_schema)
+    ts=int(time())
+    if insert(ts, {"query":query,"image":img},"test"):
+        schedule_thumbnail(ts, img, query)
     return jsonify({
         "status": "success",
         "query": query,
@@ -44,16 +70,45 @@ def getTitleImage(id):
 def fetchjson_data():
     query = request.args.get("id")
     print("Received query:", request.form)
+    # full-resolution image only on demand; the thumbnail row carries its own title,
+    # so this path never reads the full log payload
+    if request.args.get("full")!="1" and query!="0":
+        stored=getthumbnail(query)
+        if stored:
+            thumbnail,title=stored
+            return jsonify({
+                "url": thumbnail,
+                "title":title,
+                "thumbnail":True
+            })
     title,image=getTitleImage(query)
     return jsonify({
         "url": image,
-	"title":title
+	"title":title,
+        "thumbnail":False
     })
  
+@app.route("/api/thumbnail", methods=["GET"])
+def thumbnail_data():
+    # served as an image so history cards can load thumbnails lazily
+    id=request.args.get("id")
+    stored=getthumbnail(id) if id else None
+    if not stored:
+        return jsonify({"status": "not found"}), 404
+    header,payload=stored[0].split(",",1)
+    return Response(
+        b64decode(payload),
+        mimetype=header[len("data:"):].split(";")[0],
+        headers={"Cache-Control": "public, max-age=31536000, immutable"}
+    )
+ 
 @app.route("/api/history", methods=["POST","GET"])
 def log_data():   
+    titles=gettitles()
     return jsonify({
-        "history": getlogs(),}
+        "history": getlogs(),
+        "thumbnails": list(titles),
+        "titles": titles,}
     )
 
  
@@ -57,7 +57,11 @@ setLoading(1)
       body: formData,
     });
     const result = await res.json();
-    setData({url:result.image_url , title:result.query}) 
+    if (result.status === "error") {
+      alert(result.message);
+    } else {
+      setData({url:result.image_url , title:result.query}) 
+    }
     
     setQuery("");
     setFile(null);
@@ -132,13 +136,18 @@ const ChatDisplayArea = ({ isLoading, data }) => {
  
 
 
-const HistoryCard = ({ date, title, setActive, active,id ,setChat}) => {
+const HistoryCard = ({ date, title, setActive, active,id ,setChat, thumbnail, query, loadingRef}) => {
   
   const handleClick = async () => {  
     setActive(id);
+    loadingRef.current = id;
     try {
-      const res = await fetch(`${Server}/api/log?id=${id}`);
+      // show the thumbnail straight away, then swap in the full-resolution chart
+      if (thumbnail) setChat({ url: thumbnail, title: query });
+      const res = await fetch(`${Server}/api/log?id=${id}&full=1`);
       const data = await res.json();
+      // another card was clicked while this one was loading
+      if (loadingRef.current !== id) return;
       setChat({ url: data.url, title: data.title });
     } catch (err) {
       console.error("Error fetching chat:", err);
@@ -155,6 +164,9 @@ const HistoryCard = ({ date, title, setActive, active,id ,setChat}) => {
             : "bg-gray-800 hover:bg-gray-700 border-gray-700 text-gray-200"
         }`}
     > 
+      {thumbnail && (
+        <img src={thumbnail} alt={title} loading="lazy" className="w-full rounded-lg mb-2" />
+      )}
       <div className="text-xs text-gray-400 mb-1">{date}</div>
  
       <div className="font-medium text-sm truncate">{title}</div>
@@ -166,12 +178,17 @@ const HistoryCard = ({ date, title, setActive, active,id ,setChat}) => {
 const ChatHistorySidebar = ({setChat}) => {
   const [active,setActive]=useState(0)
   const [chats,setChats]=useState([])
+  const [thumbnails,setThumbnails]=useState(new Set())
+  const [titles,setTitles]=useState({})
+  const loadingRef=useRef(0)
   
   const fetchChats = async () => {
     try {
       const res = await fetch(Server + "/api/history");
       const data = await res.json();
       setChats(data.history);
+      setThumbnails(new Set(data.thumbnails || []));
+      setTitles(data.titles || {});
       console.log(data.history)
     } catch (err) {
       console.error("Error fetching chats:", err);
@@ -190,7 +207,7 @@ useEffect(() => {
       <div className="chat-history-list">
       
         <div className="chat-history-list flex flex-col gap-2">
-        <HistoryCard  date="Current" setActive={setActive} setChat={setChat} active={active} id={0} title="" />
+        <HistoryCard  date="Current" setActive={setActive} setChat={setChat} active={active} id={0} title="" loadingRef={loadingRef} />
 
 
 
@@ -205,6 +222,9 @@ useEffect(() => {
   year: "numeric",
 })}
     title={`Chat ${index + 1}`}
+    thumbnail={thumbnails.has(chatTimestamp) ? `${Server}/api/thumbnail?id=${chatTimestamp}` : ""}
+    query={titles[chatTimestamp]}
+    loadingRef={loadingRef}
     setActive={setActive}
     active={active}
     setChat={setChat} 
@@ -216,6 +236,7 @@ useEffect(() => {
       <div className="new-chat-button-placeholder cursor-target" onClick={()=>{
         fetchChats()
         setActive(0)
+        loadingRef.current = 0
         setChat({url:"",title:""})
       }} >+ New Chat</div>
 
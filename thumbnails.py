@@ -0,0 +1,79 @@
+import argparse
+import base64
+import io
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from log_db import insert_thumbnails, iter_missing_thumbnails
+
+THUMBNAIL_WIDTH = 240
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_QUALITY = 70
+
+# Single worker: thumbnails are cheap, and one writer keeps sqlite contention low.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+
+
+def _decode_data_url(image: str) -> bytes:
+    """Strip an optional `data:...;base64,` prefix and decode the payload."""
+    if image.startswith("data:"):
+        image = image.split(",", 1)[1]
+    return base64.b64decode(image)
+
+
+def make_thumbnail(image: str, width: int = THUMBNAIL_WIDTH) -> str:
+    """
+    Downscale a base64 (or data URL) chart image to `width` pixels wide
+    and return it as a WebP data URL.
+    """
+    img = Image.open(io.BytesIO(_decode_data_url(image)))
+    img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA")
+    if img.width > width:
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+
+    buffered = io.BytesIO()
+    img.save(buffered, format=THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY, method=4)
+    return "data:image/webp;base64," + base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def _store_thumbnail(timestamp: int, image: str, title: str, db_path: str) -> None:
+    try:
+        insert_thumbnails([(timestamp, make_thumbnail(image), title)], db_path=db_path)
+    except Exception as e:
+        # the backfill picks up anything that failed here
+        print("⚠️ Thumbnail generation failed for", timestamp, ":", e)
+
+
+def schedule_thumbnail(timestamp: int, image: str, title: str = "", db_path: str = 'logs.sqlite3') -> None:
+    """Generate and store the thumbnail (and its title) for a log entry in the background."""
+    _executor.submit(_store_thumbnail, timestamp, image, title, db_path)
+
+
+def backfill(batch_size: int = 50, db_path: str = 'logs.sqlite3') -> int:
+    """
+    Generate thumbnails for every stored log that lacks one.
+    Rows are processed and written in batches; returns the number written.
+    """
+    written = 0
+    for batch in iter_missing_thumbnails(batch_size=batch_size, db_path=db_path):
+        rows = []
+        for timestamp, log in batch:
+            image = log.get("image") if isinstance(log, dict) else None
+            if not image:
+                continue
+            try:
+                rows.append((timestamp, make_thumbnail(image), log.get("query") or ""))
+            except Exception as e:
+                print("⚠️ Skipping", timestamp, ":", e)
+        written += insert_thumbnails(rows, db_path=db_path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill history thumbnails for existing logs.")
+    parser.add_argument("--db", default="logs.sqlite3", help="Path to the logs database")
+    parser.add_argument("--batch-size", type=int, default=50, help="Rows processed per batch")
+    args = parser.parse_args()
+    print("Thumbnails written:", backfill(batch_size=args.batch_size, db_path=args.db))